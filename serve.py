@@ -2,137 +2,516 @@
 from __future__ import annotations
 
 import argparse
+import bisect
+import email.utils
+import functools
+import gzip
 import html
 import os
+import queue
 import random
+import re
+import threading
 import urllib.parse
+import zlib
+from collections import OrderedDict
+from collections.abc import Callable, Iterator
+from datetime import timezone
 from pathlib import Path
-from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import BinaryIO
+
+try:
+    from watchdog.observers import Observer
+except ImportError:  # optional; HTMLIndex falls back to stat-based revalidation
+    Observer = None
+from http.server import HTTPServer, BaseHTTPRequestHandler
+
+# A safe segment is non-empty, is not "." or "..", does not start with "/" or
+# "~", and contains no backslashes or NUL bytes.
+_SAFE_SEGMENT_RE = re.compile(r"\A(?!\.\.?\Z)[^/~\\\x00][^/\\\x00]*\Z")
+
 
 def _is_safe_segment(seg: str) -> bool:
     """Check if a single path segment is safe (no traversal tricks)."""
-    if not seg:
-        return False
-    if seg in (".", ".."):
-        return False
-    if "\\" in seg or "\x00" in seg:
-        return False
-    if seg.startswith(("/", "~")):
-        return False
-    return True
-
-
-def parse_url(url_path: str) -> tuple[list[str], dict[str, str]]:
+    return _SAFE_SEGMENT_RE.match(seg) is not None
+
+
+def parse_url(url_path: str) -> tuple[list[str], bool]:
     """
-    Parse a URL path into sanitized segments and query parameters.
-    Returns (segments, query_dict).
+    Parse a URL path into sanitized segments and whether a listing was asked for.
+    Returns (segments, has_list).
     segments is a list of safe path parts, e.g. "/silly/forest" -> ["silly", "forest"]
-    Returns (["__INVALID__"], {}) if any segment fails validation.
+    has_list is True if the query has a "list" key, e.g. "?list" or "?list=1".
+    Returns (["__INVALID__"], has_list) if any segment fails validation.
     """
-    parsed = urllib.parse.urlparse(url_path)
-    path = urllib.parse.unquote(parsed.path)
-    query = dict(urllib.parse.parse_qsl(parsed.query, keep_blank_values=True))
-
-    # Also accept bare "?list" (no value) which parse_qsl misses
-    if "list" not in query and "?list" in url_path:
-        query["list"] = ""
+    segments, has_list = _parse_url(url_path)
+    return list(segments), has_list
+
+
+@functools.lru_cache(maxsize=1024)
+def _parse_url(url_path: str) -> tuple[tuple[str, ...], bool]:
+    # Cached worker for parse_url(); returns immutable results so cache hits
+    # can be shared between requests.
+    if url_path.startswith("/") and not url_path.startswith("//") and ";" not in url_path:
+        # Plain "/path?query#fragment": split it directly instead of going
+        # through urlparse(), which gives the same result here.
+        raw_path, _, raw_query = url_path.partition("#")[0].partition("?")
+    else:
+        parsed = urllib.parse.urlparse(url_path)
+        raw_path, raw_query = parsed.path, parsed.query
+    path = urllib.parse.unquote(raw_path)
+
+    # "list" is the only query key we act on, so don't decode the rest.
+    # The "?list" check keeps accepting it however the query is spelled.
+    has_list = "?list" in url_path or any(
+        p == "list" or p.startswith("list=") for p in raw_query.split("&")
+    )
 
     if path == "/":
-        return [], query
+        return (), has_list
 
-    raw_segments = [s for s in path.strip("/").split("/") if s]
+    raw_segments = tuple(s for s in path.strip("/").split("/") if s)
     if not raw_segments:
-        return [], query
+        return (), has_list
 
     for seg in raw_segments:
         if not _is_safe_segment(seg):
-            return ["__INVALID__"], query
+            return ("__INVALID__",), has_list
 
-    return raw_segments, query
+    return raw_segments, has_list
 
 
-def list_html_files(base_dir: Path, only_dir: str | None) -> list[Path]:
+def _scandir_html(
+    root: str, mtimes: list[tuple[str, int]] | None = None
+) -> Iterator[os.DirEntry]:
     """
-    Return a list of *.html files under base_dir.
-    If only_dir is provided, only search under base_dir/only_dir.
+    Yield DirEntry objects for *.html files below root.
+    Hidden files and directories are skipped, and symlinked directories are
+    not followed (matching Path.rglob).
+    If mtimes is given, (path, st_mtime_ns) is appended for every directory
+    that was scanned.
     """
-    root = base_dir if only_dir is None else (base_dir / only_dir)
+    stack = [root]
+    while stack:
+        path = stack.pop()
+        try:
+            if mtimes is not None:
+                mtimes.append((path, os.stat(path).st_mtime_ns))
+            it = os.scandir(path)
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                if entry.name.startswith("."):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.endswith(".html") and entry.is_file():
+                    yield entry
 
-    if not root.exists() or not root.is_dir():
-        return []
 
-    # Find *.html files recursively
-    files: list[Path] = []
-    for p in root.rglob("*.html"):
-        if p.is_file():
-            # Ensure it resolves inside base_dir
-            try:
-                rp = p.resolve(strict=True)
-                rb = base_dir.resolve(strict=True)
-                rel = rp.relative_to(rb)
-                # Visualizations live below a category directory. Ignore the
-                # generated static site so local builds do not duplicate them.
-                if len(rel.parts) < 2 or rel.parts[0] == "_site":
-                    continue
-                if any(part.startswith(".") for part in rel.parts):
-                    continue
-                files.append(rp)
-            except Exception:
-                # If it doesn't resolve or escapes base_dir, skip
-                continue
+def _iter_html_files(
+    base: str, only_dir: str | None, mtimes: list[tuple[str, int]] | None = None
+) -> Iterator[str]:
+    prefix = base + os.sep
+
+    # Visualizations live below a category directory. Ignore the generated
+    # static site so local builds do not duplicate them.
+    if only_dir is None:
+        try:
+            if mtimes is not None:
+                mtimes.append((base, os.stat(base).st_mtime_ns))
+            with os.scandir(base) as it:
+                roots = [
+                    entry.path
+                    for entry in it
+                    if entry.is_dir(follow_symlinks=False)
+                    and not entry.name.startswith(".")
+                    and entry.name != "_site"
+                ]
+        except OSError:
+            return
+    elif only_dir.startswith(".") or only_dir == "_site":
+        return
+    else:
+        root = os.path.join(base, only_dir)
+        # only_dir itself may be a symlink; the walk below does not follow
+        # any others.
+        if not os.path.realpath(root).startswith(prefix):
+            return
+        roots = [root]
+
+    for root in roots:
+        for entry in _scandir_html(root, mtimes):
+            # Only symlinked files can resolve outside base
+            if not entry.is_symlink() or os.path.realpath(entry.path).startswith(prefix):
+                yield entry.path
+
+
+def list_html_files(
+    resolved_base: str,
+    only_dir: str | None,
+    mtimes: list[tuple[str, int]] | None = None,
+    groups: dict[str, list[tuple[str, str]]] | None = None,
+) -> list[str]:
+    """
+    Return a list of *.html file paths under resolved_base.
+    resolved_base must already be resolved (see main()).
+    If only_dir is provided, only search under resolved_base/only_dir.
+    If mtimes is given, it collects the directory mtimes the result depends on.
+    If groups is given, each file is also added to groups[category] as
+    (display, name), e.g. ("forest", "silly/forest"), keeping each list sorted.
+    """
+    if groups is None:
+        return list(_iter_html_files(resolved_base, only_dir, mtimes))
+
+    files: list[str] = []
+    start = len(resolved_base) + 1
+    for path in _iter_html_files(resolved_base, only_dir, mtimes):
+        files.append(path)
+        rel_parts = path[start:].split(os.sep)
+        display = rel_parts[-1][:-5]  # strip ".html"
+        name = "/".join(rel_parts)[:-5]
+        bisect.insort(groups.setdefault(rel_parts[0], []), (display, name))
     return files
 
 
-def try_serve_exact(base_dir: Path, segments: list[str]) -> Path | None:
+_Mtimes = tuple[tuple[str, int], ...]
+_Groups = dict[str, list[tuple[str, str]]]
+
+
+def _listing_etag(data: bytes) -> str:
+    return f'"{zlib.crc32(data):08x}-{len(data):x}"'
+
+
+class HTMLIndex:
+    """
+    Process-wide cache of list_html_files() results and rendered listings.
+    Entries are keyed by only_dir and revalidated against the mtime of every
+    directory the scan visited, so adding or removing a file anywhere in the
+    tree invalidates them.
+    If watch() succeeds, the cache is instead cleared on filesystem events and
+    lookups do no revalidation at all.
+    """
+
+    def __init__(self, resolved_base: str):
+        self.resolved_base = resolved_base
+        self._lock = threading.Lock()
+        # only_dir -> (mtimes, files, groups)
+        self._files: dict[str | None, tuple[_Mtimes, list[str], _Groups]] = {}
+        self._listings: dict[str | None, tuple[_Mtimes, bytes, str]] = {}
+        # Bumped by invalidate() so scans that raced with it aren't stored
+        self._generation = 0
+        self._watching = False
+
+    def watch(self) -> bool:
+        """
+        Watch resolved_base with watchdog, if it is installed, and clear the
+        cache whenever files or directories are created, deleted or moved.
+        Returns True if watching, False if stat-based revalidation stays on.
+        """
+        if Observer is None:
+            return False
+        observer = Observer()
+        observer.daemon = True
+        try:
+            observer.schedule(_InvalidateOnChange(self), self.resolved_base, recursive=True)
+            observer.start()
+        except OSError:
+            # e.g. out of inotify watches
+            return False
+        self._watching = True
+        return True
+
+    def invalidate(self):
+        """Drop all cached file lists and listings."""
+        with self._lock:
+            self._generation += 1
+            self._files.clear()
+            self._listings.clear()
+
+    @staticmethod
+    def _is_fresh(mtimes: _Mtimes) -> bool:
+        try:
+            return all(os.stat(path).st_mtime_ns == mtime for path, mtime in mtimes)
+        except OSError:
+            return False
+
+    def _lookup(self, only_dir: str | None) -> tuple[_Mtimes, list[str], _Groups]:
+        with self._lock:
+            cached = self._files.get(only_dir)
+            generation = self._generation
+        if cached is not None and (self._watching or self._is_fresh(cached[0])):
+            return cached
+
+        mtimes: list[tuple[str, int]] = []
+        groups: _Groups = {}
+        files = list_html_files(self.resolved_base, only_dir, mtimes, groups)
+        entry = (tuple(mtimes), files, groups)
+        # Nothing was scanned (e.g. the directory does not exist); do not let
+        # arbitrary request paths grow the cache.
+        if mtimes:
+            with self._lock:
+                if self._generation == generation:
+                    self._files[only_dir] = entry
+        return entry
+
+    def files(self, only_dir: str | None) -> list[str]:
+        """Return list_html_files(resolved_base, only_dir), rescanning only on change."""
+        return self._lookup(only_dir)[1]
+
+    def listing(
+        self, only_dir: str | None, render: Callable[[_Groups], bytes]
+    ) -> tuple[bytes, str]:
+        """
+        Return (render(groups), etag) for only_dir, re-rendering only on change.
+        """
+        with self._lock:
+            generation = self._generation
+        mtimes, _, groups = self._lookup(only_dir)
+        with self._lock:
+            cached = self._listings.get(only_dir)
+        if cached is not None and cached[0] == mtimes:
+            return cached[1], cached[2]
+
+        data = render(groups)
+        etag = _listing_etag(data)
+        if mtimes:
+            with self._lock:
+                if self._generation == generation:
+                    self._listings[only_dir] = (mtimes, data, etag)
+        return data, etag
+
+
+class _InvalidateOnChange:
+    """
+    watchdog event handler for HTMLIndex.watch(). Only events that can change
+    the set of *.html files matter; content edits don't affect the index.
+    """
+
+    def __init__(self, index: HTMLIndex):
+        self.index = index
+
+    def dispatch(self, event):
+        if event.event_type not in ("created", "deleted", "moved"):
+            return
+        paths = (event.src_path, getattr(event, "dest_path", ""))
+        if event.is_directory or any(os.fsdecode(p).endswith(".html") for p in paths):
+            self.index.invalidate()
+
+
+def try_serve_exact(resolved_base: str, segments: list[str]) -> str | None:
     """
     Try to resolve segments as an exact HTML file path.
-    E.g. ["silly", "forest"] -> base_dir/silly/forest.html
-    Returns the resolved Path if it exists and is safe, or None.
+    E.g. ["silly", "forest"] -> resolved_base/silly/forest.html
+    resolved_base must already be resolved (see main()).
+    Returns the resolved file path if it exists and is safe, or None.
     """
     if len(segments) < 2:
         return None
 
-    # Build relative path, auto-append .html
-    rel = "/".join(segments)
-    if not rel.endswith(".html"):
-        rel += ".html"
-
-    candidate = base_dir / rel
+    # Build the path, auto-append .html
+    candidate = os.path.join(resolved_base, *segments)
+    if not candidate.endswith(".html"):
+        candidate += ".html"
 
-    # Resolve and ensure it stays within base_dir
-    try:
-        resolved = candidate.resolve(strict=True)
-        resolved_base = base_dir.resolve(strict=True)
-        resolved.relative_to(resolved_base)
-    except Exception:
+    # Resolve symlinks and ensure it stays within resolved_base
+    resolved = os.path.realpath(candidate)
+    if not resolved.startswith(resolved_base + os.sep):
         return None
 
-    if resolved.is_file() and resolved.suffix == ".html":
+    if os.path.isfile(resolved):
         return resolved
 
     return None
 
 
+# Static parts of the ?list page. The title goes between _LISTING_HEAD and
+# _LISTING_STYLE and again between _LISTING_STYLE and _LISTING_HINT.
+_LISTING_HEAD = b"""<!doctype html>
+<html lang="en"><head><meta charset="utf-8"/>
+<title>"""
+_LISTING_STYLE = b"""</title>
+<style>
+  body { font-family: system-ui, sans-serif; background: #0a0a12; color: #e0e0e8;
+         max-width: 720px; margin: 40px auto; padding: 0 20px; }
+  h1 { font-size: 22px; font-weight: 700; margin-bottom: 8px; }
+  h2 { font-size: 16px; font-weight: 600; color: #8090b0; margin: 28px 0 8px; }
+  ul { list-style: none; padding: 0; }
+  li { margin: 4px 0; }
+  a { color: #7ab8ff; text-decoration: none; padding: 6px 10px; display: inline-block;
+      border-radius: 8px; transition: background .15s; }
+  a:hover { background: rgba(122,184,255,.12); }
+  .hint { font-size: 13px; color: #667; margin-top: 4px; }
+</style>
+</head><body>
+<h1>"""
+_LISTING_HINT = b"""</h1>
+<p class="hint">Click a name to view it directly, or visit a directory path for a random pick.</p>
+"""
+_LISTING_TAIL = b"</body></html>"
+
+# UTF-8 encoded html.escape() results for directory names, titles and file
+# names, which repeat across listing renders. Bounded LRU.
+_ESCAPE_CACHE: OrderedDict[str, bytes] = OrderedDict()
+_ESCAPE_CACHE_LOCK = threading.Lock()
+_ESCAPE_CACHE_MAX = 10_000
+
+
+def _esc(s: str) -> bytes:
+    """Memoized html.escape(s).encode("utf-8")."""
+    with _ESCAPE_CACHE_LOCK:
+        v = _ESCAPE_CACHE.get(s)
+        if v is not None:
+            _ESCAPE_CACHE.move_to_end(s)
+            return v
+        v = html.escape(s).encode("utf-8")
+        _ESCAPE_CACHE[s] = v
+        if len(_ESCAPE_CACHE) > _ESCAPE_CACHE_MAX:
+            _ESCAPE_CACHE.popitem(last=False)
+        return v
+
+
+# Recently served files: path -> (st_mtime_ns, st_size, raw body, gzip body or
+# None if compressing did not help). Least recently used entries are evicted
+# once the bodies exceed _FILE_CACHE_MAX_BYTES; files larger than
+# _FILE_CACHE_MAX_ENTRY are never cached and are streamed instead.
+_FILE_CACHE: OrderedDict[str, tuple[int, int, bytes, bytes | None]] = OrderedDict()
+_FILE_CACHE_LOCK = threading.Lock()
+_FILE_CACHE_MAX_BYTES = 128 * 1024 * 1024
+_FILE_CACHE_MAX_ENTRY = 8 * 1024 * 1024
+_file_cache_bytes = 0
+
+
+def _load_file(path: str, st: os.stat_result) -> tuple[bytes, bytes | None]:
+    """
+    Return (raw, gzipped) bodies for path, reading and compressing it only if
+    the cached copy is missing or st shows the file has changed.
+    Raises OSError if the file cannot be read.
+    """
+    global _file_cache_bytes
+
+    with _FILE_CACHE_LOCK:
+        cached = _FILE_CACHE.get(path)
+        if cached is not None and cached[:2] == (st.st_mtime_ns, st.st_size):
+            _FILE_CACHE.move_to_end(path)
+            return cached[2], cached[3]
+
+    with open(path, "rb") as f:
+        st = os.fstat(f.fileno())
+        raw = f.read()
+    gz: bytes | None = gzip.compress(raw, compresslevel=6)
+    if len(gz) >= len(raw):
+        gz = None
+
+    with _FILE_CACHE_LOCK:
+        old = _FILE_CACHE.pop(path, None)
+        if old is not None:
+            _file_cache_bytes -= len(old[2]) + len(old[3] or b"")
+        _FILE_CACHE[path] = (st.st_mtime_ns, len(raw), raw, gz)
+        _file_cache_bytes += len(raw) + len(gz or b"")
+        while _file_cache_bytes > _FILE_CACHE_MAX_BYTES:
+            _, old = _FILE_CACHE.popitem(last=False)
+            _file_cache_bytes -= len(old[2]) + len(old[3] or b"")
+    return raw, gz
+
+
+def _accepts_gzip(accept_encoding: str) -> bool:
+    """Check if an Accept-Encoding header value allows gzip."""
+    for part in accept_encoding.split(","):
+        coding, _, params = part.partition(";")
+        if coding.strip().lower() == "gzip":
+            _, _, q = params.replace(" ", "").partition("q=")
+            try:
+                return not q or float(q) > 0
+            except ValueError:
+                return False
+    return False
+
+
+# Exact file paths and listings may be cached briefly, but must then be
+# revalidated; random picks must not be cached at all.
+_CACHE_CONTROL = "max-age=60, must-revalidate"
+_CACHE_CONTROL_RANDOM = "no-store"
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Check an If-None-Match header value against etag (weak comparison)."""
+    if if_none_match.strip() == "*":
+        return True
+    etag = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+class PooledHTTPServer(HTTPServer):
+    """
+    HTTPServer that hands connections to idle worker threads when there are
+    any, and otherwise starts a new one, like ThreadingHTTPServer. There is no
+    cap on concurrent connections; up to spare_workers threads stay around
+    between connections so the common case avoids starting a thread.
+    """
+
+    def __init__(self, server_address, handler_class, spare_workers: int):
+        super().__init__(server_address, handler_class)
+        self.spare_workers = spare_workers
+        self._requests: queue.SimpleQueue = queue.SimpleQueue()
+        # Workers blocked in _requests.get(); each put() is matched by one
+        self._idle = 0
+        self._idle_lock = threading.Lock()
+
+    def process_request(self, request, client_address):
+        with self._idle_lock:
+            if self._idle:
+                self._idle -= 1
+                self._requests.put((request, client_address))
+                return
+        # Daemon threads, like ThreadingHTTPServer.daemon_threads, so that
+        # idle keep-alive clients do not block shutdown.
+        threading.Thread(target=self._worker, args=(request, client_address), daemon=True).start()
+
+    def _worker(self, request, client_address):
+        while True:
+            # Same as ThreadingMixIn.process_request_thread
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+            with self._idle_lock:
+                if self._idle >= self.spare_workers:
+                    return
+                self._idle += 1
+            request, client_address = self._requests.get()
+
+
 class RandomHTMLHandler(BaseHTTPRequestHandler):
     server_version = "RandomHTML/0.2"
+    # Persistent connections; every response must send Content-Length.
+    protocol_version = "HTTP/1.1"
+    # Don't let stalled clients hold a worker forever mid-request
+    timeout = 30
+    # Idle keep-alive connections are closed after this many seconds
+    keepalive_timeout = 5
 
     def do_GET(self):
-        base_dir: Path = self.server.base_dir  # type: ignore[attr-defined]
-        segments, query = parse_url(self.path)
+        resolved_base: str = self.server.resolved_base  # type: ignore[attr-defined]
+        segments, has_list = parse_url(self.path)
 
         if segments == ["__INVALID__"]:
             self.send_error(400, "Invalid path")
             return
 
         # --- Mode 1: ?list --- show a clickable directory listing
-        if "list" in query:
+        if has_list:
             only_dir = segments[0] if len(segments) == 1 else None
-            self._serve_listing(base_dir, only_dir)
+            self._serve_listing(only_dir)
             return
 
         # --- Mode 2: exact file path (2+ segments, e.g. /silly/forest) ---
         if len(segments) >= 2:
-            exact = try_serve_exact(base_dir, segments)
+            exact = try_serve_exact(resolved_base, segments)
             if exact:
                 self._serve_file(exact)
             else:
@@ -141,92 +520,211 @@ class RandomHTMLHandler(BaseHTTPRequestHandler):
 
         # --- Mode 3: random (root or single directory segment) ---
         only_dir = segments[0] if len(segments) == 1 else None
-        candidates = list_html_files(base_dir, only_dir)
+        index: HTMLIndex = self.server.index  # type: ignore[attr-defined]
+        candidates = index.files(only_dir)
 
         if not candidates:
-            self.send_response(404)
-            self.send_header("Content-Type", "text/html; charset=utf-8")
-            self.end_headers()
             msg = "No HTML files found"
             if only_dir:
                 msg += f" in directory {html.escape(only_dir)}"
-            self.wfile.write(f"<h1>{msg}</h1>".encode("utf-8"))
+            data = f"<h1>{msg}</h1>".encode("utf-8")
+            self.send_response(404)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
             return
 
-        chosen = random.choice(candidates)
-        self._serve_file(chosen)
+        self._serve_file(random.choice(candidates), cacheable=False)
 
-    def _serve_file(self, path: Path):
+    def _serve_file(self, path: str, cacheable: bool = True):
+        """
+        Send the file at path. If cacheable is false (random picks), the
+        response is marked no-store and carries no validators.
+        """
         try:
-            data = path.read_bytes()
+            st = os.stat(path)
         except OSError:
             self.send_error(500, "Failed to read file")
             return
 
-        self.send_response(200)
-        self.send_header("Content-Type", "text/html; charset=utf-8")
-        self.send_header("Content-Length", str(len(data)))
-        self.end_headers()
-        self.wfile.write(data)
+        if cacheable:
+            # Weak, since the identity and gzip bodies share it
+            etag = f'W/"{st.st_mtime_ns:x}-{st.st_size:x}"'
+            if self._not_modified(etag, st.st_mtime):
+                self._send_not_modified(etag, (("Vary", "Accept-Encoding"),))
+                return
+            cache_headers = [
+                ("ETag", etag),
+                ("Last-Modified", email.utils.formatdate(st.st_mtime, usegmt=True)),
+                ("Cache-Control", _CACHE_CONTROL),
+            ]
+        else:
+            cache_headers = [("Cache-Control", _CACHE_CONTROL_RANDOM)]
+
+        if st.st_size > _FILE_CACHE_MAX_ENTRY:
+            try:
+                f = open(path, "rb")
+            except OSError:
+                self.send_error(500, "Failed to read file")
+                return
+            self._stream_file(f, cache_headers)
+            return
 
-    def _serve_listing(self, base_dir: Path, only_dir: str | None):
-        files = list_html_files(base_dir, only_dir)
-        resolved_base = base_dir.resolve(strict=True)
+        try:
+            raw, gz = _load_file(path, st)
+        except OSError:
+            self.send_error(500, "Failed to read file")
+            return
 
-        # Group files by directory
-        groups: dict[str, list[tuple[str, str]]] = {}
-        for f in sorted(files):
-            try:
-                rel = f.relative_to(resolved_base)
-            except ValueError:
-                continue
-            parts = rel.parts
-            if len(parts) < 2:
-                continue
-            directory = parts[0]
-            name = rel.with_suffix("").as_posix()  # e.g. "silly/forest"
-            display = parts[-1].removesuffix(".html")
-            groups.setdefault(directory, []).append((name, display))
-
-        # Build HTML
-        title = f"Visualizations — {html.escape(only_dir)}" if only_dir else "Visualizations"
-        lines = [
-            "<!doctype html>",
-            '<html lang="en"><head><meta charset="utf-8"/>',
-            f"<title>{title}</title>",
-            "<style>",
-            "  body { font-family: system-ui, sans-serif; background: #0a0a12; color: #e0e0e8;",
-            "         max-width: 720px; margin: 40px auto; padding: 0 20px; }",
-            "  h1 { font-size: 22px; font-weight: 700; margin-bottom: 8px; }",
-            "  h2 { font-size: 16px; font-weight: 600; color: #8090b0; margin: 28px 0 8px; }",
-            "  ul { list-style: none; padding: 0; }",
-            "  li { margin: 4px 0; }",
-            "  a { color: #7ab8ff; text-decoration: none; padding: 6px 10px; display: inline-block;",
-            "      border-radius: 8px; transition: background .15s; }",
-            "  a:hover { background: rgba(122,184,255,.12); }",
-            "  .hint { font-size: 13px; color: #667; margin-top: 4px; }",
-            "</style>",
-            "</head><body>",
-            f"<h1>{title}</h1>",
-            '<p class="hint">Click a name to view it directly, or visit a directory path for a random pick.</p>',
-        ]
+        use_gzip = gz is not None and _accepts_gzip(self.headers.get("Accept-Encoding", ""))
+        extra = b"Vary: Accept-Encoding\r\n"
+        if use_gzip:
+            extra += b"Content-Encoding: gzip\r\n"
+        for keyword, value in cache_headers:
+            extra += f"{keyword}: {value}\r\n".encode("latin-1")
+        self._fast_200(gz if use_gzip else raw, extra)
+
+    def _stream_file(self, f: BinaryIO, cache_headers: list[tuple[str, str]]):
+        with f:
+            size = os.fstat(f.fileno()).st_size
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(size))
+            self.send_header("Vary", "Accept-Encoding")
+            for keyword, value in cache_headers:
+                self.send_header(keyword, value)
+            self.end_headers()
+            # wfile is unbuffered, so the headers are already on the socket.
+            # socket.sendfile() uses os.sendfile() (zero-copy) where available
+            # and falls back to plain send() calls otherwise.
+            sent = self.connection.sendfile(f, 0, size)
+            if sent != size:
+                # The file shrank underneath us; Content-Length is now wrong.
+                self.close_connection = True
+
+    def _serve_listing(self, only_dir: str | None):
+        index: HTMLIndex = self.server.index  # type: ignore[attr-defined]
+        data, etag = index.listing(only_dir, lambda groups: self._render_listing(groups, only_dir))
+
+        if self._not_modified(etag):
+            self._send_not_modified(etag)
+            return
+
+        self._fast_200(data, f"ETag: {etag}\r\nCache-Control: {_CACHE_CONTROL}\r\n".encode("latin-1"))
+
+    @functools.cached_property
+    def _fast_200_head(self) -> bytes:
+        """Status line and fixed headers for _fast_200(), as send_response() would write them."""
+        return (
+            f"{self.protocol_version} 200 {self.responses[200][0]}\r\n"
+            f"Server: {self.version_string()}\r\n"
+            f"Content-Type: text/html; charset=utf-8\r\n"
+        ).encode("latin-1")
+
+    def _fast_200(self, body: bytes, extra: bytes = b""):
+        """
+        Send a 200 text/html response with body in a single write, bypassing
+        send_response()/send_header(). extra holds any additional header
+        lines, each ending in CRLF.
+        """
+        self.log_request(200)
+        if self.request_version == "HTTP/0.9":
+            # No status line or headers in HTTP/0.9
+            self.wfile.write(body)
+            return
+        connection = b"" if self.close_connection else b"Connection: keep-alive\r\n"
+        self.wfile.write(
+            self._fast_200_head
+            + b"Date: " + self.date_time_string().encode("latin-1") + b"\r\n"
+            + b"Content-Length: " + str(len(body)).encode("latin-1") + b"\r\n"
+            + extra
+            + connection
+            + b"\r\n"
+            + body
+        )
+
+    @staticmethod
+    def _render_listing(groups: _Groups, only_dir: str | None) -> bytes:
+        # groups comes from list_html_files(), already sorted by display
+        # name and then by path within each directory.
+        if only_dir:
+            title_bytes = "Visualizations — ".encode("utf-8") + _esc(only_dir)
+        else:
+            title_bytes = b"Visualizations"
+        buf = bytearray(_LISTING_HEAD)
+        buf += title_bytes
+        buf += _LISTING_STYLE
+        buf += title_bytes
+        buf += _LISTING_HINT
 
         for directory in sorted(groups):
-            lines.append(f"<h2>{html.escape(directory)}/</h2><ul>")
-            for name, display in sorted(groups[directory], key=lambda x: x[1]):
-                safe_name = html.escape(name)
-                safe_display = html.escape(display)
-                lines.append(f'  <li><a href="/{safe_name}">{safe_display}</a></li>')
-            lines.append("</ul>")
-
-        lines.append("</body></html>")
-
-        data = "\n".join(lines).encode("utf-8")
-        self.send_response(200)
-        self.send_header("Content-Type", "text/html; charset=utf-8")
-        self.send_header("Content-Length", str(len(data)))
+            buf += b"<h2>"
+            buf += _esc(directory)
+            buf += b"/</h2><ul>\n"
+            for display, name in groups[directory]:
+                buf += b'  <li><a href="/'
+                buf += _esc(name)
+                buf += b'">'
+                buf += _esc(display)
+                buf += b"</a></li>\n"
+            buf += b"</ul>\n"
+
+        buf += _LISTING_TAIL
+        return bytes(buf)
+
+    def _not_modified(self, etag: str, mtime: float | None = None) -> bool:
+        """
+        Check the request's If-None-Match (or, failing that, If-Modified-Since
+        against mtime) to see if the client's copy is current.
+        """
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            return _etag_matches(if_none_match, etag)
+
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_modified_since is None or mtime is None:
+            return False
+        try:
+            since = email.utils.parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        # Last-Modified only has second resolution
+        return int(mtime) <= since.timestamp()
+
+    def _send_not_modified(self, etag: str, extra_headers: tuple[tuple[str, str], ...] = ()):
+        # A 304 carries the headers the 200 would have sent that affect caching
+        self.send_response(304)
+        for key, value in extra_headers:
+            self.send_header(key, value)
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", _CACHE_CONTROL)
         self.end_headers()
-        self.wfile.write(data)
+
+    def handle(self):
+        # Like BaseHTTPRequestHandler.handle(), but a persistent connection only
+        # waits keepalive_timeout for its next request, not the full timeout.
+        self.close_connection = True
+        self.handle_one_request()
+        while not self.close_connection:
+            self.connection.settimeout(self.keepalive_timeout)
+            try:
+                # Returns at once if a pipelined request is already buffered
+                if not self.rfile.peek(1):
+                    break
+            except OSError:
+                break
+            self.connection.settimeout(self.timeout)
+            self.handle_one_request()
+
+    def end_headers(self):
+        # send_error() and HTTP/1.0 requests without keep-alive set
+        # close_connection; otherwise say explicitly that we keep it open.
+        if not self.close_connection:
+            self.send_header("Connection", "keep-alive")
+        super().end_headers()
 
     def log_message(self, fmt, *args):
         # Keep logs concise
@@ -238,14 +736,19 @@ def main():
     parser.add_argument("--base", default=".", help="Base directory containing subdirectories (default: .)")
     parser.add_argument("--host", default="0.0.0.0", help="Host/interface to bind (default: 0.0.0.0)")
     parser.add_argument("--port", type=int, default=8000, help="Port to bind (default: 8000)")
+    parser.add_argument("--workers", type=int, default=32, help="Idle worker threads kept for reuse (default: 32)")
     args = parser.parse_args()
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
 
     base_dir = Path(args.base).resolve()
     if not base_dir.is_dir():
         raise SystemExit(f"Base path is not a directory: {base_dir}")
 
-    httpd = ThreadingHTTPServer((args.host, args.port), RandomHTMLHandler)
-    httpd.base_dir = base_dir  # attach for handler access
+    httpd = PooledHTTPServer((args.host, args.port), RandomHTMLHandler, args.workers)
+    httpd.resolved_base = str(base_dir)  # already resolved above
+    httpd.index = HTMLIndex(httpd.resolved_base)
+    httpd.index.watch()
 
     print(f"Serving random HTML from: {base_dir}")
     print(f"  Random from all:    http://{args.host}:{args.port}/")